@@ -10,26 +10,34 @@ Version: 2.0 - Standalone (no Excel dependencies)
 All WBS operations data is embedded in wbs_operations_mapper.py
 
 Usage:
-    python sap_to_heavybid.py
+    python sap_to_heavybid.py [input_file] [output]
     
     The script will guide you through selecting:
     - Your SAP export file (via file picker)
     - Output folder (via folder picker)
     
     The output file will be automatically named <Order>_actuals.xlsx in the selected folder.
+    Paths given on the command line skip the matching picker; <output> may be a
+    folder (auto-named file) or an explicit .xlsx path.
     
 Requirements:
     - sap_to_heavybid.py (this file)
     - reference_data.py (operations and cost elements dictionary)
     - pandas, openpyxl libraries
+    - python-calamine (optional, faster Excel reading)
+    - xlsxwriter (optional, faster Excel writing)
 """
 
 import pandas as pd
 import numpy as np
 from datetime import datetime
-from collections import defaultdict
+from collections import defaultdict, namedtuple
 import sys
 import os
+import argparse
+import importlib.util
+import json
+import logging
 import time
 import tkinter as tk
 from tkinter import filedialog
@@ -38,89 +46,54 @@ from tkinter import filedialog
 from reference_data import build_operations_map, build_cost_elements_map
 
 
-# Cost Element to Resource Code Abbreviation Mapping
-COST_ELEMENT_TO_ABBREV = {
+log = logging.getLogger(__name__)
+
+
+# Default cost type for labor (660xxxx)
+LABOR_COST_TYPE = 'Labor'
+
+# Hardcoded Cost Element reference data, one record per cost element:
+#   abbrev    - Resource Code abbreviation
+#   job_cost  - Job Cost Code
+#   cost_type - Cost Type
+CostElementInfo = namedtuple('CostElementInfo', ['abbrev', 'job_cost', 'cost_type'])
+
+COST_ELEMENT_TABLE = {
     # AFUDC
-    5590030: 'AFUDC-Bo',
-    5590031: 'AFUDC-Eq',
+    5590030: CostElementInfo('AFUDC-Bo', 5590030, 'AFUDC'),      # AFUDC-Borrowed
+    5590031: CostElementInfo('AFUDC-Eq', 5590031, 'AFUDC'),      # AFUDC-Equity
     
     # Contracts / Overhead
-    5091100: 'Meals Ex',
-    5091140: 'Reimburs',
-    5490000: 'Contract',
-    5490003: 'Engr/Dsg',
-    5490015: 'Environm',
+    5091100: CostElementInfo('Meals Ex', 5091100, 'Contracts'),  # Meals Expense
+    5091140: CostElementInfo('Reimburs', 5091140, 'Contracts'),  # Reimbursed Mileage E
+    5490000: CostElementInfo('Contract', 5490000, 'Contracts'),  # Contracts
+    5490003: CostElementInfo('Engr/Dsg', 5490003, 'Contracts'),  # Engr/Dsgn & EPC
+    5490015: CostElementInfo('Environm', 5490015, 'Contracts'),  # Environment Contract
     
     # Labor Allocation (overhead)
-    'Labor Alloc.': 'Labor OH',
-    
-    # Labor Cost Elements (660xxxx)
-    6603001: 'CONSTR',   # Construction
-    6603004: 'ACQLIT',   # Acquisition - Misc
-    6603005: 'ANLYST',   # Analyst Services
-    6603006: 'DRFT',     # Design Drafting Svcs
-    6603023: 'ENGSVC',   # Engineering Services
-    6603024: 'ENVSVC',   # Environmental Svcs
-    6603027: 'ENVPLN',   # Environ Pln & Permit
-    6603048: 'PLANSV',   # Planning Services
-    6603058: 'TECHSV',   # Technical Services
-    6603059: 'LNDENG',   # Land Survey & Engine
-    6603082: 'MO-OT',    # Maint & Oper OT Svcs
-    6603083: 'MO',       # Maintain & Oper Svc
-    6603150: 'ADM-OT',   # Admin Svcs-OT
-    6603195: 'CORRSN',   # Corrosion Service
-    6603227: 'LNDRTS',   # Land Rights - Misc
-    6603823: 'BIOCUL',   # Manage L&EM
-    6608158: 'XCON02',   # Contrctr - Consult
-    6608160: 'XCON04',   # Contrctr - Engineer
-}
-
-# Cost Element to Job Cost Code Mapping
-COST_ELEMENT_TO_JOB_COST = {
-    5590030: 5590030,  # AFUDC-Borrowed
-    5590031: 5590031,  # AFUDC-Equity
-    5091100: 5091100,  # Meals Expense
-    5091140: 5091140,  # Reimbursed Mileage E
-    5490000: 5490000,  # Contracts
-    5490003: 5490003,  # Engr/Dsgn & EPC
-    5490015: 5490015,  # Environment Contract
-    'Labor Alloc.': 'Labor Alloc.',
-    # Labor codes map to themselves
-    6603001: 6603001,
-    6603004: 6603004,
-    6603005: 6603005,
-    6603006: 6603006,
-    6603023: 6603023,
-    6603024: 6603024,
-    6603027: 6603027,
-    6603048: 6603048,
-    6603058: 6603058,
-    6603059: 6603059,
-    6603082: 6603082,
-    6603083: 6603083,
-    6603150: 6603150,
-    6603195: 6603195,
-    6603227: 6603227,
-    6603823: 6603823,
-    6608158: 6608158,
-    6608160: 6608160,
+    'Labor Alloc.': CostElementInfo('Labor OH', 'Labor Alloc.', 'Labor Alloc.'),
+    
+    # Labor Cost Elements (660xxxx) - job cost codes map to themselves
+    6603001: CostElementInfo('CONSTR', 6603001, LABOR_COST_TYPE),  # Construction
+    6603004: CostElementInfo('ACQLIT', 6603004, LABOR_COST_TYPE),  # Acquisition - Misc
+    6603005: CostElementInfo('ANLYST', 6603005, LABOR_COST_TYPE),  # Analyst Services
+    6603006: CostElementInfo('DRFT', 6603006, LABOR_COST_TYPE),    # Design Drafting Svcs
+    6603023: CostElementInfo('ENGSVC', 6603023, LABOR_COST_TYPE),  # Engineering Services
+    6603024: CostElementInfo('ENVSVC', 6603024, LABOR_COST_TYPE),  # Environmental Svcs
+    6603027: CostElementInfo('ENVPLN', 6603027, LABOR_COST_TYPE),  # Environ Pln & Permit
+    6603048: CostElementInfo('PLANSV', 6603048, LABOR_COST_TYPE),  # Planning Services
+    6603058: CostElementInfo('TECHSV', 6603058, LABOR_COST_TYPE),  # Technical Services
+    6603059: CostElementInfo('LNDENG', 6603059, LABOR_COST_TYPE),  # Land Survey & Engine
+    6603082: CostElementInfo('MO-OT', 6603082, LABOR_COST_TYPE),   # Maint & Oper OT Svcs
+    6603083: CostElementInfo('MO', 6603083, LABOR_COST_TYPE),      # Maintain & Oper Svc
+    6603150: CostElementInfo('ADM-OT', 6603150, LABOR_COST_TYPE),  # Admin Svcs-OT
+    6603195: CostElementInfo('CORRSN', 6603195, LABOR_COST_TYPE),  # Corrosion Service
+    6603227: CostElementInfo('LNDRTS', 6603227, LABOR_COST_TYPE),  # Land Rights - Misc
+    6603823: CostElementInfo('BIOCUL', 6603823, LABOR_COST_TYPE),  # Manage L&EM
+    6608158: CostElementInfo('XCON02', 6608158, LABOR_COST_TYPE),  # Contrctr - Consult
+    6608160: CostElementInfo('XCON04', 6608160, LABOR_COST_TYPE),  # Contrctr - Engineer
 }
 
-# Cost Element to Cost Type Mapping
-COST_ELEMENT_TO_COST_TYPE = {
-    5590030: 'AFUDC',
-    5590031: 'AFUDC',
-    5091100: 'Contracts',
-    5091140: 'Contracts',
-    5490000: 'Contracts',
-    5490003: 'Contracts',
-    5490015: 'Contracts',
-    'Labor Alloc.': 'Labor Alloc.',
-}
-
-# Default cost type for labor (660xxxx)
-LABOR_COST_TYPE = 'Labor'
-
 # Cost Type to Description Prefix Mapping (for Resource File)
 COST_TYPE_TO_PREFIX = {
     'AFUDC': 'Actls. - AFUDC - ',
@@ -131,16 +104,74 @@ COST_TYPE_TO_PREFIX = {
 # Default prefix for unknown cost types
 DEFAULT_PREFIX = 'Actls. - Other. - '
 
+# Known first-word abbreviations (used when deriving from Cost Element Text)
+ABBREV_WORD_MAPPING = {
+    'consulting': 'Consult',
+    'consult': 'Consult',
+    'engineering': 'Engr',
+    'engineer': 'Engr',
+    'environmental': 'Environ',
+    'environment': 'Environ',
+    'construction': 'Constr',
+    'contract': 'Contract',
+    'meals': 'Meals',
+    'reimbursed': 'Reimburs',
+    'maintain': 'MO',  # If no &, but starts with "Maintain"
+}
+# Common words skipped when building multi-word acronyms
+ABBREV_SKIP_WORDS = {'and', 'the', 'of', 'services', 'service', 'svc', 'svcs'}
+# Suffixes removed from single-word abbreviations
+ABBREV_WORD_SUFFIXES = ('services', 'service', 'svc', 'svcs')
+
+# SAP export columns used by the transformation (all other columns are skipped on read)
+SAP_EXPORT_COLUMNS = [
+    'Order', 'Operation', 'Cost Element', 'Partner-CCtr', 'Cost element name',
+    'Total quantity', 'Val.in rep.cur.'
+]
+# Numeric columns, converted after the header/summary rows are dropped
+# (those rows can hold text such as 'Total' or '-' in these columns)
+SAP_EXPORT_NUMERIC_COLUMNS = ['Operation', 'Total quantity', 'Val.in rep.cur.']
+
+# Excel reader engine: the Rust-backed calamine reader (pandas >= 2.2 with
+# python-calamine installed) is much faster than openpyxl; None = pandas default
+_PANDAS_VERSION = tuple(int(part) for part in pd.__version__.split('.')[:2])
+EXCEL_READ_ENGINE = (
+    'calamine'
+    if _PANDAS_VERSION >= (2, 2) and importlib.util.find_spec('python_calamine')
+    else None
+)
+
+# Excel writer engine: xlsxwriter writes much faster than openpyxl. Its
+# constant_memory mode is not used - pandas writes cells column by column,
+# which that streaming mode silently drops
+EXCEL_WRITE_ENGINE = 'xlsxwriter' if importlib.util.find_spec('xlsxwriter') else 'openpyxl'
+
+# Last-used picker folders, remembered between runs
+# (%LOCALAPPDATA% on Windows, the user config folder - ~/.config by default - elsewhere)
+LAST_PATHS_FILE = os.path.join(
+    os.environ.get('LOCALAPPDATA')
+    or os.environ.get('XDG_CONFIG_HOME')
+    or os.path.join(os.path.expanduser('~'), '.config'),
+    'sap_to_heavybid', 'last_paths.json'
+)
+
 
 def read_sap_export(filepath):
     """Read and clean SAP export file"""
-    df = pd.read_excel(filepath)
+    df = pd.read_excel(filepath, engine=EXCEL_READ_ENGINE, usecols=SAP_EXPORT_COLUMNS)
     
     # Remove rows where Order is null (header/summary rows)
-    df_clean = df[df['Order'].notna()].copy()
+    df_clean = df[df['Order'].notna()]
+    if len(df_clean) == 0:
+        raise ValueError("No valid Order found in SAP export")
     
-    print(f"Loaded {len(df_clean)} rows from SAP export")
-    print(f"Order number: {df_clean['Order'].unique()[0]:.0f}")
+    # Convert the numeric columns (stray text becomes NaN)
+    df_clean = df_clean.assign(**{
+        column: pd.to_numeric(df_clean[column], errors='coerce') for column in SAP_EXPORT_NUMERIC_COLUMNS
+    })
+    
+    log.info("Loaded %d rows from SAP export", len(df_clean))
+    log.info("Order number: %.0f", df_clean['Order'].iloc[0])
     
     return df_clean
 
@@ -156,6 +187,11 @@ def normalize_cost_element(cost_element):
         return None
 
 
+def cost_element_ints(cost_elements):
+    """Vectorized normalize_cost_element: Cost Element column as nullable Int64 (NA if not numeric)"""
+    return np.trunc(pd.to_numeric(cost_elements, errors='coerce')).astype('Int64')
+
+
 def derive_abbreviation_from_text(text):
     """
     Dynamically derive abbreviation from cost element text.
@@ -201,27 +237,12 @@ def derive_abbreviation_from_text(text):
     
     # Pattern 2: Known word mappings (first word)
     first_word = words[0].lower() if words else ''
-    word_mapping = {
-        'consulting': 'Consult',
-        'consult': 'Consult',
-        'engineering': 'Engr',
-        'engineer': 'Engr',
-        'environmental': 'Environ',
-        'environment': 'Environ',
-        'construction': 'Constr',
-        'contract': 'Contract',
-        'meals': 'Meals',
-        'reimbursed': 'Reimburs',
-        'maintain': 'MO',  # If no &, but starts with "Maintain"
-    }
-    
-    if first_word in word_mapping:
-        return word_mapping[first_word]
+    if first_word in ABBREV_WORD_MAPPING:
+        return ABBREV_WORD_MAPPING[first_word]
     
     # Pattern 3: Multi-word acronym (first letter of first 2-3 significant words)
     # Skip common words like "and", "the", "of", "services"
-    skip_words = {'and', 'the', 'of', 'services', 'service', 'svc', 'svcs'}
-    significant_words = [w for w in words[:3] if w.lower() not in skip_words]
+    significant_words = [w for w in words[:3] if w.lower() not in ABBREV_SKIP_WORDS]
     
     if len(significant_words) >= 2:
         # Take first letter of first 2 significant words
@@ -233,7 +254,7 @@ def derive_abbreviation_from_text(text):
     # Pattern 4: Single word - use first 6-8 chars, remove common suffixes
     if words:
         clean_word = first_word
-        for suffix in ['services', 'service', 'svc', 'svcs']:
+        for suffix in ABBREV_WORD_SUFFIXES:
             if clean_word.endswith(suffix):
                 clean_word = clean_word[:-len(suffix)]
                 break
@@ -246,44 +267,118 @@ def derive_abbreviation_from_text(text):
     return None
 
 
-def generate_resource_code(cost_element, partner_cctr, cost_element_name, cost_elements_map=None):
-    """Generate resource code from cost element and partner center"""
-    
-    # Normalize cost element to int
+def build_abbreviation_map(cost_elements_map=None):
+    """
+    Resolve the resource abbreviation of every known cost element in one pass.
+    Abbreviations are derived from each cost elements map entry's 'Cost Element Text';
+    hardcoded COST_ELEMENT_TABLE entries (known correct mappings) take precedence.
+    Cost elements missing from the result fall back to abbreviate_cost_element_name.
+    """
+    abbrev_map = {}
+    for ce, ce_data in (cost_elements_map or {}).items():
+        text = ce_data.get('Cost Element Text', '')
+        abbrev = derive_abbreviation_from_text(text) if text else None
+        if abbrev is not None:
+            abbrev_map[ce] = abbrev
+    abbrev_map.update((ce, ce_info.abbrev) for ce, ce_info in COST_ELEMENT_TABLE.items())
+    return abbrev_map
+
+
+def abbreviate_cost_element_name(cost_element_name):
+    """Fallback abbreviation for unknown codes, built from the cost element name"""
+    name_parts = str(cost_element_name).upper().split()
+    if len(name_parts) >= 2:
+        return ''.join(word[:3] for word in name_parts[:2])
+    return str(cost_element_name).upper()[:6]
+
+
+def get_cost_type(cost_element, cost_elements_map=None):
+    """Determine Cost Type (using embedded cost elements map if available)"""
+    # Normalize to int for lookup
     ce_int = normalize_cost_element(cost_element)
     
-    # Check hardcoded mapping FIRST (takes precedence - these are known correct mappings)
-    abbrev = None
-    if ce_int:
-        abbrev = COST_ELEMENT_TO_ABBREV.get(ce_int)
-    
-    # If no hardcoded mapping, try embedded cost elements map with smart derivation
-    if abbrev is None and cost_elements_map and ce_int:
+    # Try embedded cost elements map first
+    if cost_elements_map and ce_int:
         ce_data = cost_elements_map.get(ce_int)
         if ce_data:
-            text = ce_data.get('Cost Element Text', '')
-            if text:
-                abbrev = derive_abbreviation_from_text(text)
-    
-    # If still no abbreviation, try to create from cost element name (fallback)
-    if abbrev is None:
-        # Try to create abbreviation from cost element name
-        # For unknown codes, create a simplified abbreviation
-        name_parts = str(cost_element_name).upper().split()
-        if len(name_parts) >= 2:
-            abbrev = ''.join(word[:3] for word in name_parts[:2])
-        else:
-            abbrev = str(cost_element_name).upper()[:6]
+            # Use Level 1 Group or Grouping to determine Cost Type
+            level1_group = ce_data.get('Level 1 Group', '')
+            grouping = ce_data.get('Grouping', '')
+            
+            # Map to Cost Type
+            if level1_group == 'Contract' or grouping == 'Contract':
+                return 'Contracts'
+            elif level1_group == 'Labor' or grouping == 'Labor':
+                return LABOR_COST_TYPE
+            elif level1_group == 'OverHeads' or grouping == 'OverHeads':
+                return 'Labor Alloc.'
+            elif level1_group == 'Materials' or grouping == 'Materials':
+                return 'Other'
     
-    # Build resource code
-    if pd.notna(partner_cctr) and partner_cctr > 0:
-        # Labor resource with partner center
-        resource_code = f"6{abbrev}{int(partner_cctr)}"
+    # Fall back to hardcoded mapping
+    if ce_int and ce_int in COST_ELEMENT_TABLE:
+        return COST_ELEMENT_TABLE[ce_int].cost_type
+    elif ce_int and str(ce_int).startswith('660'):
+        return LABOR_COST_TYPE
+    elif ce_int and str(ce_int).startswith('50'):
+        # Cost elements starting with 50 are typically Contracts
+        return 'Contracts'
     else:
-        # Header/contract resource without partner center
-        resource_code = f"6{abbrev}"
-    
-    return resource_code
+        return 'Other'
+
+
+def build_lump_sum_rows(biditem, activity, resource, unit_price, supp_desc, description, cost_type):
+    """
+    Build lump-sum (LS) Actuals Report rows such as Labor OH and AFUDC.
+    Each argument may be a single value (repeated on every row) or one value per row.
+    """
+    return pd.DataFrame({
+        'BidItem': biditem,
+        'Activity': activity,
+        'Resource': resource,
+        'Quantity': 1.0,
+        'Units': 'LS',
+        'Unit Price': unit_price,
+        'Tax/OT %': 100,
+        'Crew Code': np.nan,
+        'Pieces': 1,
+        'Currency': np.nan,
+        'EOE %': np.nan,
+        'Rent Percent': np.nan,
+        'Escalation Percent': np.nan,
+        'Hours Adjustment': np.nan,
+        'Supp. Desc': supp_desc,
+        'MH/Unit': np.nan,
+        'Material Factor Type': np.nan,
+        'Material Factor': np.nan,
+        'Description': description,
+        'Cost Type': cost_type,
+    })
+
+
+def get_afudc_activity(operations_map):
+    """
+    Get the activity for AFUDC rows under BidItem 1010
+    AFUDC activity changes the operation number's last digit from 0 to 1
+    E.g., 0101-1010A becomes 0101-1011A
+    """
+    activity_base = operations_map.get(1010, {}).get('activity', '0101-1010A')
+    if activity_base[-2] == '0':
+        return activity_base[:-2] + '1' + activity_base[-1]
+    return activity_base
+
+
+def lexsort_rows(df, columns):
+    """
+    Stable multi-column sort (same order as df.sort_values(columns)).
+    Each key is factorized to sorted integer codes once, so np.lexsort compares
+    integers instead of strings. NaN keys sort last.
+    """
+    sort_codes = []
+    for column in reversed(columns):
+        codes, uniques = pd.factorize(df[column], sort=True)
+        sort_codes.append(np.where(codes < 0, len(uniques), codes))
+    return df.iloc[np.lexsort(sort_codes)]
 
 
 def aggregate_actuals(df_export, operations_map, cost_elements_map=None):
@@ -293,72 +388,93 @@ def aggregate_actuals(df_export, operations_map, cost_elements_map=None):
     """
     
     # First, calculate AFUDC totals from Operation 1.0 before filtering it out
-    afudc_borrowed_total = df_export[
-        (df_export['Operation'] == 1.0) & 
-        (df_export['Cost Element'] == 5590030.0)
-    ]['Val.in rep.cur.'].sum()
-    
-    afudc_equity_total = df_export[
-        (df_export['Operation'] == 1.0) & 
-        (df_export['Cost Element'] == 5590031.0)
-    ]['Val.in rep.cur.'].sum()
-    
-    # Calculate Labor OH (overhead) totals per operation (601xxxx cost elements)
-    overhead_by_operation = df_export[
-        df_export['Cost Element'].astype(str).str.startswith('6010')
-    ].groupby('Operation')['Val.in rep.cur.'].sum().to_dict()
+    # The value, operation and cost element columns are extracted once; the AFUDC totals,
+    # the overhead totals and the row filter below all work on these same arrays
+    values = df_export['Val.in rep.cur.'].to_numpy()
+    operations = df_export['Operation'].to_numpy()
+    cost_element_values = df_export['Cost Element'].to_numpy()
+    is_operation_1 = operations == 1.0
+    is_afudc_borrowed = is_operation_1 & (cost_element_values == 5590030.0)
+    is_afudc_equity = is_operation_1 & (cost_element_values == 5590031.0)
+    
+    afudc_borrowed_total = np.nansum(values[is_afudc_borrowed])
+    afudc_equity_total = np.nansum(values[is_afudc_equity])
+    
+    # Convert Cost Element to integer once; the overhead filters reuse it.
+    # Cost elements are 7-digit codes, so "starts with 6010" is 6010xxx // 1000 == 6010
+    ce_int = cost_element_ints(df_export['Cost Element'])
+    is_overhead = (ce_int // 1000 == 6010).fillna(False).to_numpy(dtype=bool)
+    
+    # Calculate Labor OH (overhead) totals per operation (6010xxx cost elements)
+    # Only the value array is masked and grouped, not the whole export
+    overhead_by_operation = pd.Series(values[is_overhead]).groupby(
+        operations[is_overhead]
+    ).sum().to_dict()
     
     # Filter out only AFUDC cost elements from Operation 1.0 (5590030, 5590031)
     # Keep other cost elements from Operation 1.0 - they map to BidItem 1010
-    df_filtered = df_export[
-        ~((df_export['Operation'] == 1.0) & 
-          (df_export['Cost Element'].isin([5590030.0, 5590031.0])))
-    ].copy()
-    
-    # Filter out overhead cost elements (601xxxx) - these don't appear in the output
-    df_filtered = df_filtered[~df_filtered['Cost Element'].astype(str).str.startswith('6010')].copy()
-    
-    # Group by Operation, Cost Element, and Partner-CCtr (treat NaN Partner-CCtr as a separate group)
-    df_filtered['Partner-CCtr_str'] = df_filtered['Partner-CCtr'].fillna(0).astype(str)
+    # Overhead cost elements (6010xxx) are dropped in the same pass - they don't appear in the output
+    # Rows without an Operation can't be grouped, so they are dropped here as well
+    keep = ~(is_overhead | is_afudc_borrowed | is_afudc_equity) & pd.notna(operations)
+    df_filtered = df_export[keep]
+    
+    # Group by Operation, Cost Element, and Partner-CCtr (NaN Partner-CCtr is grouped as 0)
+    # Partner-CCtr is grouped as read, so alphanumeric cost centers keep their own groups
+    # Operation codes are whole numbers, so they are grouped as int64 instead of float
+    # The low-cardinality name key is grouped as a categorical (integer codes, no string hashing)
+    # Cost Element stays as read - it can hold text codes such as 'Labor Alloc.'
+    name_dtype = df_filtered['Cost element name'].dtype
+    group_keys = [
+        df_filtered['Operation'].astype('int64'),
+        df_filtered['Cost Element'],
+        df_filtered['Partner-CCtr'].fillna(0),
+        df_filtered['Cost element name'].astype('category'),
+    ]
     
-    grouped = df_filtered.groupby(['Operation', 'Cost Element', 'Partner-CCtr_str', 'Cost element name']).agg({
+    grouped = df_filtered.groupby(group_keys, observed=True).agg({
         'Total quantity': 'sum',
         'Val.in rep.cur.': 'sum'
     }).reset_index()
+    grouped['Cost element name'] = grouped['Cost element name'].astype(name_dtype)
     
-    # Convert Partner-CCtr back to numeric
-    grouped['Partner-CCtr'] = pd.to_numeric(grouped['Partner-CCtr_str'], errors='coerce')
-    grouped.drop('Partner-CCtr_str', axis=1, inplace=True)
+    # Only numeric partner centers become resource suffixes; text ones are left blank (NaN)
+    grouped['Partner-CCtr'] = pd.to_numeric(grouped['Partner-CCtr'], errors='coerce')
     
     # Generate resource codes (using embedded cost elements map if available)
-    # Create a closure to capture cost_elements_map
-    def make_resource_code(row):
-        return generate_resource_code(
-            row['Cost Element'], 
-            row['Partner-CCtr'], 
-            row['Cost element name'], 
-            cost_elements_map
-        )
-    
-    grouped['Resource'] = grouped.apply(make_resource_code, axis=1)
-    
-    # Map operations to BidItems and Activities
-    grouped['BidItem'] = grouped['Operation'].astype(int)
-    grouped['Activity'] = grouped['Operation'].apply(
-        lambda op: operations_map.get(int(op), {}).get('activity', f'XXXX-{int(op)}A')
+    # Abbreviations come from a lookup table built once per run; the name
+    # fallback runs once per distinct name. Each abbreviation is turned into its
+    # "6<abbrev>" header code once, then both tables are mapped onto the rows
+    cost_elements = cost_element_ints(grouped['Cost Element'])
+    unique_cost_elements = cost_elements.dropna().unique()
+    header_codes = {ce: f"6{abbrev}" for ce, abbrev in build_abbreviation_map(cost_elements_map).items()}
+    name_header_codes = {
+        name: f"6{abbreviate_cost_element_name(name)}" for name in grouped['Cost element name'].unique()
+    }
+    header_code = cost_elements.map(header_codes).fillna(grouped['Cost element name'].map(name_header_codes))
+    
+    # Labor resources carry their partner center, header/contract resources don't
+    partner = grouped['Partner-CCtr']
+    has_partner = partner.notna() & (partner > 0)
+    partner_suffix = partner.where(has_partner, 0).astype('int64').astype(str).where(has_partner, '')
+    grouped['Resource'] = header_code + partner_suffix
+    
+    # Map operations to BidItems and Activities (unknown operations get XXXX-<op>A)
+    # The activity table and the BidItem 1010 AFUDC activity are resolved once per run
+    operation_ints = grouped['Operation']
+    activity_map = {
+        op: op_data.get('activity', f'XXXX-{op}A') for op, op_data in operations_map.items()
+    }
+    afudc_activity = get_afudc_activity(operations_map)
+    grouped['BidItem'] = operation_ints
+    grouped['Activity'] = operation_ints.map(activity_map).fillna(
+        'XXXX-' + operation_ints.astype(str) + 'A'
     )
     
     # Map Operation 1.0 non-AFUDC rows to BidItem 1010 with AFUDC activity pattern
     # These rows should appear under BidItem 1010, Activity 0101-1011A (same as AFUDC)
-    operation_1_mask = (grouped['Operation'] == 1.0)
+    operation_1_mask = (grouped['Operation'] == 1)
     if operation_1_mask.any():
         grouped.loc[operation_1_mask, 'BidItem'] = 1010
-        # Use AFUDC activity pattern: 0101-1010A -> 0101-1011A
-        base_activity = operations_map.get(1010, {}).get('activity', '0101-1010A')
-        if base_activity[-2] == '0':
-            afudc_activity = base_activity[:-2] + '1' + base_activity[-1]
-        else:
-            afudc_activity = base_activity
         grouped.loc[operation_1_mask, 'Activity'] = afudc_activity
     
     # Add other required columns
@@ -366,10 +482,10 @@ def aggregate_actuals(df_export, operations_map, cost_elements_map=None):
     grouped['Units'] = 'HR'  # Default unit
     
     # Calculate Unit Price = Val.in rep.cur. / Quantity (handle divide by zero)
-    grouped['Unit Price'] = grouped.apply(
-        lambda row: row['Val.in rep.cur.'] / row['Quantity'] if row['Quantity'] != 0 else row['Val.in rep.cur.'],
-        axis=1
-    )
+    # Both operands are divided as floats, so a zero quantity gives inf and is masked out
+    value = pd.to_numeric(grouped['Val.in rep.cur.'], errors='coerce').astype('float64')
+    quantity = pd.to_numeric(grouped['Quantity'], errors='coerce').astype('float64')
+    grouped['Unit Price'] = (value / quantity).where(quantity != 0, value)
     
     grouped['Tax/OT %'] = 100  # Should be 100, not 1
     grouped['Crew Code'] = np.nan  # Blank as requested
@@ -386,48 +502,13 @@ def aggregate_actuals(df_export, operations_map, cost_elements_map=None):
     grouped['Description'] = grouped['Cost element name']
     
     # Determine Cost Type (using embedded cost elements map if available)
-    # Create a closure to capture cost_elements_map
-    def make_get_cost_type(cost_elements_map):
-        def get_cost_type(cost_element):
-            # Normalize to int for lookup
-            ce_int = normalize_cost_element(cost_element)
-            
-            # Try embedded cost elements map first
-            if cost_elements_map and ce_int:
-                ce_data = cost_elements_map.get(ce_int)
-                if ce_data:
-                    # Use Level 1 Group or Grouping to determine Cost Type
-                    level1_group = ce_data.get('Level 1 Group', '')
-                    grouping = ce_data.get('Grouping', '')
-                    
-                    # Map to Cost Type
-                    if level1_group == 'Contract' or grouping == 'Contract':
-                        return 'Contracts'
-                    elif level1_group == 'Labor' or grouping == 'Labor':
-                        return LABOR_COST_TYPE
-                    elif level1_group == 'OverHeads' or grouping == 'OverHeads':
-                        return 'Labor Alloc.'
-                    elif level1_group == 'Materials' or grouping == 'Materials':
-                        return 'Other'
-            
-            # Fall back to hardcoded mapping
-            if ce_int and ce_int in COST_ELEMENT_TO_COST_TYPE:
-                return COST_ELEMENT_TO_COST_TYPE[ce_int]
-            elif ce_int and str(ce_int).startswith('660'):
-                return LABOR_COST_TYPE
-            elif ce_int and str(ce_int).startswith('50'):
-                # Cost elements starting with 50 are typically Contracts
-                return 'Contracts'
-            else:
-                return 'Other'
-        return get_cost_type
-    
-    grouped['Cost Type'] = grouped['Cost Element'].apply(make_get_cost_type(cost_elements_map))
+    cost_types = {ce: get_cost_type(ce, cost_elements_map) for ce in unique_cost_elements}
+    grouped['Cost Type'] = cost_elements.map(cost_types).fillna(get_cost_type(None))
     
     # Set quantity to 1.0 for all non-labor rows (placeholder)
     # AND set Unit Price to the total value for non-labor rows
     non_labor_mask = grouped['Cost Type'] != LABOR_COST_TYPE
-    grouped.loc[non_labor_mask, 'Unit Price'] = grouped.loc[non_labor_mask, 'Val.in rep.cur.']
+    grouped.loc[non_labor_mask, 'Unit Price'] = value[non_labor_mask]
     grouped.loc[non_labor_mask, 'Quantity'] = 1.0
     grouped.loc[non_labor_mask, 'Units'] = 'LS'
     
@@ -436,132 +517,56 @@ def aggregate_actuals(df_export, operations_map, cost_elements_map=None):
     # IMPORTANT: Use Operation (not BidItem) to look up overhead, since Operation 1.0
     # gets remapped to BidItem 1010, and we need to track which Operation each
     # BidItem/Activity combination came from to avoid duplicates
-    labor_oh_rows = []
-    
-    # Track which BidItem/Activity combinations we've already added Labor OH for
-    # to prevent duplicates when multiple operations map to the same BidItem
-    added_labor_oh = set()
-    
-    # Iterate over unique Operation/BidItem/Activity combinations to correctly
-    # map overhead values to their source operations
-    for (operation, biditem, activity) in grouped[['Operation', 'BidItem', 'Activity']].drop_duplicates().values:
-        # Create a unique key for this BidItem/Activity combination
-        key = (biditem, activity)
-        
-        # Skip if we've already added Labor OH for this BidItem/Activity
-        if key in added_labor_oh:
-            continue
-        
-        # Get the overhead value for the ORIGINAL operation (not the BidItem)
-        # Operation is already a float in the grouped dataframe
-        operation_float = float(operation)
-        overhead_value = overhead_by_operation.get(operation_float, 0.0)
-        
-        # Only add Labor OH row if there's actual overhead value (skip zero values and NaN)
-        # Use epsilon check for floating-point precision
-        if pd.notna(overhead_value) and abs(overhead_value) > 1e-10:
-            labor_oh_row = {
-                'BidItem': biditem,
-                'Activity': activity,
-                'Resource': '6Labor OH',
-                'Quantity': 1.0,
-                'Units': 'LS',
-                'Unit Price': overhead_value,  # Use calculated overhead value
-                'Tax/OT %': 100,
-                'Crew Code': np.nan,
-                'Pieces': 1,
-                'Currency': np.nan,
-                'EOE %': np.nan,
-                'Rent Percent': np.nan,
-                'Escalation Percent': np.nan,
-                'Hours Adjustment': np.nan,
-                'Supp. Desc': np.nan,  # Labor Alloc. rows have NaN for Supp. Desc
-                'MH/Unit': np.nan,
-                'Material Factor Type': np.nan,
-                'Material Factor': np.nan,
-                'Description': 'Labor Alloc.',
-                'Cost Type': 'Labor Alloc.'
-            }
-            labor_oh_rows.append(labor_oh_row)
-            added_labor_oh.add(key)  # Mark this combination as processed
-    
-    if labor_oh_rows:
-        labor_oh_df = pd.DataFrame(labor_oh_rows)
-        grouped = pd.concat([grouped, labor_oh_df], ignore_index=True)
+    # BidItem and Activity are derived from Operation, so de-duplicating on the
+    # single integer Operation key yields every Operation/BidItem/Activity combination
+    oh_candidates = grouped[['Operation', 'BidItem', 'Activity']].drop_duplicates(subset=['Operation'])
+    overhead_values = oh_candidates['Operation'].map(overhead_by_operation)
+    
+    # Only add Labor OH row if there's actual overhead value (skip zero values and NaN)
+    # Use epsilon check for floating-point precision
+    has_overhead = overhead_values.abs() > 1e-10
+    labor_oh = oh_candidates[has_overhead].assign(
+        overhead=overhead_values[has_overhead]
+    ).drop_duplicates(subset=['BidItem', 'Activity'])
+    
+    # Labor OH and AFUDC rows are collected and appended in a single concat
+    lump_sum_frames = []
+    
+    if len(labor_oh):
+        labor_oh_df = build_lump_sum_rows(
+            biditem=labor_oh['BidItem'].to_numpy(),
+            activity=labor_oh['Activity'].to_numpy(),
+            resource='6Labor OH',
+            unit_price=labor_oh['overhead'].to_numpy(),  # Use calculated overhead value
+            supp_desc=np.nan,  # Labor Alloc. rows have NaN for Supp. Desc
+            description='Labor Alloc.',
+            cost_type='Labor Alloc.',
+        )
+        lump_sum_frames.append(labor_oh_df)
     
     # Add AFUDC rows ONLY if AFUDC data actually exists in the SAP export
     # Check if totals are non-zero (using epsilon for floating-point comparison)
-    afudc_rows = []
     has_afudc_borrowed = pd.notna(afudc_borrowed_total) and abs(afudc_borrowed_total) > 1e-10
     has_afudc_equity = pd.notna(afudc_equity_total) and abs(afudc_equity_total) > 1e-10
     
     if (has_afudc_borrowed or has_afudc_equity) and 1010 in grouped['BidItem'].values:
-        # Get the base activity for BidItem 1010
-        activity_base = operations_map.get(1010, {}).get('activity', '0101-1010A')
-        
-        # AFUDC activity changes the operation number's last digit from 0 to 1
-        # E.g., 0101-1010A becomes 0101-1011A
-        if activity_base[-2] == '0':
-            afudc_activity = activity_base[:-2] + '1' + activity_base[-1]
-        else:
-            afudc_activity = activity_base
-        
-        # Only add AFUDC-Borrowed if it has a value
-        if has_afudc_borrowed:
-            afudc_rows.append({
-                'BidItem': 1010,
-                'Activity': afudc_activity,
-                'Resource': '6AFUDC-Bo',
-                'Quantity': 1.0,
-                'Units': 'LS',
-                'Unit Price': afudc_borrowed_total,  # Use calculated AFUDC value
-                'Tax/OT %': 100,
-                'Crew Code': np.nan,
-                'Pieces': 1,
-                'Currency': np.nan,
-                'EOE %': np.nan,
-                'Rent Percent': np.nan,
-                'Escalation Percent': np.nan,
-                'Hours Adjustment': np.nan,
-                'Supp. Desc': 5590030.0,  # Cost Element for AFUDC-Borrowed
-                'MH/Unit': np.nan,
-                'Material Factor Type': np.nan,
-                'Material Factor': np.nan,
-                'Description': 'AFUDC-Borrowed',
-                'Cost Type': 'AFUDC'
-            })
-        
-        # Only add AFUDC-Equity if it has a value
-        if has_afudc_equity:
-            afudc_rows.append({
-                'BidItem': 1010,
-                'Activity': afudc_activity,
-                'Resource': '6AFUDC-Eq',
-                'Quantity': 1.0,
-                'Units': 'LS',
-                'Unit Price': afudc_equity_total,  # Use calculated AFUDC value
-                'Tax/OT %': 100,
-                'Crew Code': np.nan,
-                'Pieces': 1,
-                'Currency': np.nan,
-                'EOE %': np.nan,
-                'Rent Percent': np.nan,
-                'Escalation Percent': np.nan,
-                'Hours Adjustment': np.nan,
-                'Supp. Desc': 5590031.0,  # Cost Element for AFUDC-Equity
-                'MH/Unit': np.nan,
-                'Material Factor Type': np.nan,
-                'Material Factor': np.nan,
-                'Description': 'AFUDC-Equity',
-                'Cost Type': 'AFUDC'
-            })
-    
-    if afudc_rows:
-        afudc_df = pd.DataFrame(afudc_rows)
-        grouped = pd.concat([grouped, afudc_df], ignore_index=True)
+        # One row each for AFUDC-Borrowed and AFUDC-Equity, kept only if it has a value
+        afudc_df = build_lump_sum_rows(
+            biditem=1010,
+            activity=afudc_activity,
+            resource=['6AFUDC-Bo', '6AFUDC-Eq'],
+            unit_price=[afudc_borrowed_total, afudc_equity_total],  # Use calculated AFUDC values
+            supp_desc=[5590030.0, 5590031.0],  # Cost Elements for AFUDC-Borrowed / AFUDC-Equity
+            description=['AFUDC-Borrowed', 'AFUDC-Equity'],
+            cost_type='AFUDC',
+        )[[has_afudc_borrowed, has_afudc_equity]]
+        lump_sum_frames.append(afudc_df)
+    
+    if lump_sum_frames:
+        grouped = pd.concat([grouped] + lump_sum_frames, ignore_index=True)
     
     # Sort by BidItem and Activity
-    grouped = grouped.sort_values(['BidItem', 'Activity', 'Cost Type', 'Resource'])
+    grouped = lexsort_rows(grouped, ['BidItem', 'Activity', 'Cost Type', 'Resource'])
     
     # Select and order columns for Actuals Report
     actuals_columns = [
@@ -582,48 +587,32 @@ def create_resource_file(df_actuals):
     # Get unique resources with Cost Type to determine prefix
     # Use subset=['Resource'] to ensure only one row per unique Resource code
     unique_resources = df_actuals[['Resource', 'Description', 'Cost Type']].drop_duplicates(subset=['Resource'], keep='first')
-    
-    resource_data = []
-    
-    for _, row in unique_resources.iterrows():
-        resource_code = row['Resource']
-        cost_type = row['Cost Type']
-        
-        # For labor resources, use resource code (without "6" prefix) as description
-        # For other resources, use the Description from df_actuals
-        if cost_type == 'Labor':
-            # Remove "6" prefix from resource code
-            description = resource_code[1:] if resource_code.startswith('6') else resource_code
-        else:
-            description = row['Description']
-        
-        # Get prefix based on Cost Type
-        prefix = COST_TYPE_TO_PREFIX.get(cost_type, DEFAULT_PREFIX)
-        
-        # Apply prefix to description
-        prefixed_description = f"{prefix}{description}"
-        
-        # Extract cost element or type
-        is_header = resource_code in ['6AFUDC-Bo', '6AFUDC-Eq', '6Labor OH', '6Meals Ex', 
-                                       '6Reimburs', '6Engr/Dsg', '6Environm', '6Contract']
-        
-        resource_data.append({
-            'Local Resource Code': resource_code,
-            'Description': prefixed_description,
-            'Unit': np.nan,
-            'Cost': np.nan,
-            'Non-Tax?(Y/N)': np.nan,
-            'Job Cost Code 1': np.nan,
-            'Job Cost Code 2': np.nan,
-            'Job Cost Description': np.nan,
-            'Joint Venture Material Type': np.nan,
-            'MH/Unit': np.nan,
-            'Header Type? (Y/N)': np.nan,
-            'Quote Folder': np.nan,
-            'Schedule Code': np.nan
-        })
-    
-    df_resource = pd.DataFrame(resource_data)
+    resource_code = unique_resources['Resource']
+    cost_type = unique_resources['Cost Type']
+    
+    # For labor resources, use resource code (without "6" prefix) as description
+    # For other resources, use the Description from df_actuals
+    labor_description = resource_code.where(~resource_code.str.startswith('6'), resource_code.str[1:])
+    description = labor_description.where(cost_type == 'Labor', unique_resources['Description'].astype(str))
+    
+    # Get prefix based on Cost Type and apply it to the description
+    prefix = cost_type.map(COST_TYPE_TO_PREFIX).fillna(DEFAULT_PREFIX)
+    
+    df_resource = pd.DataFrame({
+        'Local Resource Code': resource_code.to_numpy(),
+        'Description': (prefix + description).to_numpy(),
+        'Unit': np.nan,
+        'Cost': np.nan,
+        'Non-Tax?(Y/N)': np.nan,
+        'Job Cost Code 1': np.nan,
+        'Job Cost Code 2': np.nan,
+        'Job Cost Description': np.nan,
+        'Joint Venture Material Type': np.nan,
+        'MH/Unit': np.nan,
+        'Header Type? (Y/N)': np.nan,
+        'Quote Folder': np.nan,
+        'Schedule Code': np.nan
+    })
     
     return df_resource
 
@@ -631,65 +620,49 @@ def create_resource_file(df_actuals):
 def create_boe_notes(df_actuals):
     """Generate BoE Notes tab from actuals data - only for activities with Labor rows"""
     
-    # Group by BidItem and Activity
-    boe_data = []
-    
     # Cross-platform date formatting (Windows doesn't support %-m/%-d)
     now = datetime.now()
     current_date = f"{now.month}/{now.day}/{now.strftime('%y')}"
     
-    for (biditem, activity), group in df_actuals.groupby(['BidItem', 'Activity']):
-        # Only include activities that have Labor rows (exclude AFUDC, Contracts-only, Labor Alloc.-only)
-        has_labor = (group['Cost Type'] == 'Labor').any()
-        
-        if not has_labor:
-            continue  # Skip activities without Labor rows
-        
-        # Build notes string
-        notes_lines = [f"{current_date}: "]
-        
-        # Get labor resources (exclude Labor OH)
-        labor_resources = group[
-            (group['Cost Type'] == 'Labor') & 
-            (~group['Resource'].str.contains('Labor OH', regex=False))
-        ]
-        
-        for _, resource_row in labor_resources.iterrows():
-            resource_code = resource_row['Resource']
-            # Remove the "6" prefix from resource code for notes
-            resource_code_display = resource_code[1:] if resource_code.startswith('6') else resource_code
-            quantity = resource_row['Quantity']
-            description = resource_row['Description']
-            
-            # Format quantity: show as integer if it's a whole number, otherwise show with decimals
-            if quantity == int(quantity):
-                qty_str = str(int(quantity))
-            else:
-                qty_str = str(quantity)
-            
-            # Include projection text with 0 instead of ___
-            notes_lines.append(f"{resource_code_display}: {qty_str} MH Actuals to date, Projected an additional 0 MH for the remainder of the Activity")
-        
-        notes = "\n".join(notes_lines)
-        
-        boe_data.append({
-            'BidItem': biditem,
-            'Activity': activity,
-            'Notes': notes
-        })
+    # Only include activities that have Labor rows (exclude AFUDC, Contracts-only, Labor Alloc.-only)
+    is_labor = df_actuals['Cost Type'] == 'Labor'
+    df_boe = df_actuals.loc[is_labor, ['BidItem', 'Activity']].drop_duplicates()
+    df_boe = df_boe.sort_values(['BidItem', 'Activity']).reset_index(drop=True)
+    
+    # Get labor resources (exclude Labor OH, which always has the literal '6Labor OH' code)
+    labor_resources = df_actuals[is_labor & (df_actuals['Resource'] != '6Labor OH')]
     
-    df_boe = pd.DataFrame(boe_data)
+    # Remove the "6" prefix from resource code for notes
+    resource_code = labor_resources['Resource']
+    resource_code_display = resource_code.where(~resource_code.str.startswith('6'), resource_code.str[1:])
+    
+    # Format quantity: show as integer if it's a whole number, otherwise show with decimals
+    quantity = labor_resources['Quantity']
+    is_whole = quantity == np.trunc(quantity)
+    if is_whole.all():
+        qty_str = quantity.astype('int64').astype(str)
+    else:
+        qty_str = quantity.astype(str).where(~is_whole, quantity.where(is_whole, 0).astype('int64').astype(str))
+    
+    # Include projection text with 0 instead of ___
+    lines = resource_code_display.str.cat(
+        qty_str + ' MH Actuals to date, Projected an additional 0 MH for the remainder of the Activity',
+        sep=': '
+    )
+    
+    # Build notes string: date header, then one line per labor resource (in row order)
+    notes_body = lines.groupby([labor_resources['BidItem'], labor_resources['Activity']]).agg('\n'.join)
+    notes_body = notes_body.reindex(pd.MultiIndex.from_frame(df_boe)).reset_index(drop=True)
+    df_boe['Notes'] = f"{current_date}: " + ('\n' + notes_body).fillna('')
     
     return df_boe
 
 
-def get_order_from_export(filepath):
-    """Extract Order number from SAP export file"""
-    df = pd.read_excel(filepath)
-    df_clean = df[df['Order'].notna()].copy()
-    if len(df_clean) == 0:
+def get_order_from_export(df_export):
+    """Extract Order number from a cleaned SAP export (see read_sap_export)"""
+    if len(df_export) == 0:
         raise ValueError("No valid Order found in SAP export")
-    order_num = int(df_clean['Order'].unique()[0])
+    order_num = int(df_export['Order'].iloc[0])
     return order_num
 
 
@@ -707,92 +680,134 @@ def generate_output_filename(order_num, output_dir):
     return output_path
 
 
-def select_input_file():
+def load_last_paths():
+    """Load last-used input/output folders (empty dict if unavailable)"""
+    try:
+        with open(LAST_PATHS_FILE, 'r', encoding='utf-8') as f:
+            last_paths = json.load(f)
+        return last_paths if isinstance(last_paths, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def save_last_paths(input_file, output_folder):
+    """Remember input/output folders for the next run (best effort)"""
+    last_paths = {
+        'input_dir': os.path.dirname(os.path.abspath(input_file)),
+        'output_dir': os.path.abspath(output_folder),
+    }
+    tmp_path = LAST_PATHS_FILE + '.tmp'
+    try:
+        os.makedirs(os.path.dirname(LAST_PATHS_FILE), exist_ok=True)
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(last_paths, f)
+        # Atomic replace so a crash never leaves a half-written file
+        os.replace(tmp_path, LAST_PATHS_FILE)
+    except OSError:
+        pass
+
+
+def select_input_file(initial_dir=None):
     """Open file picker to select SAP export file"""
     # Hide the root tkinter window
     root = tk.Tk()
     root.withdraw()
     root.attributes('-topmost', True)
     
-    # Open file dialog
+    # Open file dialog (starting in the last-used folder if known)
     filepath = filedialog.askopenfilename(
         title="Select SAP Export File",
+        initialdir=initial_dir,
         filetypes=[("Excel files", "*.xlsx *.xls"), ("All files", "*.*")]
     )
     
     root.destroy()
     
     if not filepath:
-        print("Canceled - no file selected. Exiting.")
+        log.info("Canceled - no file selected. Exiting.")
         sys.exit(0)
     
     return filepath
 
 
-def select_output_folder():
+def select_output_folder(initial_dir=None):
     """Open folder picker to select output directory"""
     # Hide the root tkinter window
     root = tk.Tk()
     root.withdraw()
     root.attributes('-topmost', True)
     
-    # Open directory dialog
+    # Open directory dialog (starting in the last-used folder if known)
     folderpath = filedialog.askdirectory(
-        title="Select Output Folder"
+        title="Select Output Folder",
+        initialdir=initial_dir
     )
     
     root.destroy()
     
     if not folderpath:
-        print("Canceled - no folder selected. Exiting.")
+        log.info("Canceled - no folder selected. Exiting.")
         sys.exit(0)
     
     return folderpath
 
 
-def transform_sap_to_heavybid(input_file, output_file):
-    """Main transformation function"""
+def parse_args(argv=None):
+    """Parse optional command-line paths (omitted paths fall back to the pickers)"""
+    parser = argparse.ArgumentParser(
+        description="Transform an SAP export into HeavyBid import format."
+    )
+    parser.add_argument('input_file', nargs='?',
+                        help="SAP export file (.xlsx/.xls); file picker opens if omitted")
+    parser.add_argument('output', nargs='?',
+                        help="Output .xlsx file or folder; folder picker opens if omitted")
+    return parser.parse_args(argv)
+
+
+def transform_sap_to_heavybid(input_file, output_file, df_export=None):
+    """Main transformation function (pass df_export to reuse an already-read export)"""
     
     banner_width = 80
     title = "SAP EXPORT TO HEAVYBID TRANSFORMATION v2.0"
     padding = (banner_width - len(title)) // 2
     
-    print("=" * banner_width)
-    print(" " * padding + title)
-    print("=" * banner_width)
+    log.info("=" * banner_width)
+    log.info(" " * padding + title)
+    log.info("=" * banner_width)
     
     # Load operations map from embedded data
-    print("\nLoading WBS operations map...")
+    log.info("\nLoading WBS operations map...")
     operations_map = build_operations_map()
-    print(f"Loaded {len(operations_map)} operation mappings")
+    log.info("Loaded %d operation mappings", len(operations_map))
     
     # Load cost elements map from embedded data
-    print("\nLoading cost elements map...")
+    log.info("\nLoading cost elements map...")
     cost_elements_map = build_cost_elements_map()
-    print(f"Loaded {len(cost_elements_map)} cost element mappings")
+    log.info("Loaded %d cost element mappings", len(cost_elements_map))
     
-    # Read SAP export
-    print(f"\nReading SAP export: {input_file}")
-    df_export = read_sap_export(input_file)
+    # Read SAP export (unless the caller already has it)
+    if df_export is None:
+        log.info("\nReading SAP export: %s", input_file)
+        df_export = read_sap_export(input_file)
     
     # Transform to actuals report
-    print("\nAggregating actuals...")
+    log.info("\nAggregating actuals...")
     df_actuals = aggregate_actuals(df_export, operations_map, cost_elements_map)
-    print(f"Generated {len(df_actuals)} actuals rows")
+    log.info("Generated %d actuals rows", len(df_actuals))
     
     # Create resource file
-    print("\nCreating resource file...")
+    log.info("\nCreating resource file...")
     df_resource = create_resource_file(df_actuals)
-    print(f"Generated {len(df_resource)} resource definitions")
+    log.info("Generated %d resource definitions", len(df_resource))
     
     # Create BoE notes
-    print("\nCreating BoE notes...")
+    log.info("\nCreating BoE notes...")
     df_boe = create_boe_notes(df_actuals)
-    print(f"Generated {len(df_boe)} BoE note entries")
+    log.info("Generated %d BoE note entries", len(df_boe))
     
     # Write to Excel with 3 tabs
-    print(f"\nWriting output to: {output_file}")
-    with pd.ExcelWriter(output_file, engine='openpyxl') as writer:
+    log.info("\nWriting output to: %s", output_file)
+    with pd.ExcelWriter(output_file, engine=EXCEL_WRITE_ENGINE) as writer:
         df_actuals.to_excel(writer, sheet_name='Actuals Report', index=False)
         df_boe.to_excel(writer, sheet_name='Actual BoE', index=False)
         df_resource.to_excel(writer, sheet_name='Resource File', index=False)
@@ -802,16 +817,21 @@ def transform_sap_to_heavybid(input_file, output_file):
     title = "TRANSFORMATION COMPLETE"
     padding = (banner_width - len(title)) // 2
     
-    print("\n" + "=" * banner_width)
-    print(" " * padding + title)
-    print("=" * banner_width)
-    print(f"\nOutput file created: {output_file}")
-    print(f"  - Actuals Report: {len(df_actuals)} rows")
-    print(f"  - Actual BoE: {len(df_boe)} rows")
-    print(f"  - Resource File: {len(df_resource)} rows")
+    log.info("\n" + "=" * banner_width)
+    log.info(" " * padding + title)
+    log.info("=" * banner_width)
+    log.info("\nOutput file created: %s", output_file)
+    log.info("  - Actuals Report: %d rows", len(df_actuals))
+    log.info("  - Actual BoE: %d rows", len(df_boe))
+    log.info("  - Resource File: %d rows", len(df_resource))
 
 
 if __name__ == '__main__':
+    # Progress messages are printed to the console as plain lines
+    logging.basicConfig(level=logging.INFO, format='%(message)s', stream=sys.stdout)
+    
+    args = parse_args()
+    
     # Display welcome banner
     banner_width = 80
     title = "SAP Actuals to HeavyBid"
@@ -821,37 +841,80 @@ if __name__ == '__main__':
     print(" " * padding + title)
     print("=" * banner_width)
     print("\nThis tool will transform your SAP export into HeavyBid import format.")
-    print("You'll be prompted to select your SAP export file and output folder.")
+    if not (args.input_file and args.output):
+        print("You'll be prompted to select your SAP export file and output folder.")
     print("The output file will contain 3 sheets: Actuals Report, Actual BoE, and Resource File.")
-    print("\nYou can cancel at any time by closing the file picker dialogs.\n")
-    
-    # Wait 1 second before opening file picker
-    print("Opening file picker in 1 second...")
-    time.sleep(1)
-    
-    # Step 1: Select input file
-    print("Step 1: Select SAP export file...")
-    input_file = select_input_file()
+    if not (args.input_file and args.output):
+        print("\nYou can cancel at any time by closing the file picker dialogs.")
+    print()
+    
+    # Pickers open in the folders used last time
+    last_paths = load_last_paths()
+    
+    # Check the output path before any work is done
+    # An existing folder, a trailing separator or a name without an extension is an output folder
+    output_file = None
+    output_folder = None
+    if args.output:
+        path_separators = tuple(sep for sep in (os.sep, os.altsep) if sep)
+        output_ext = os.path.splitext(args.output)[1]
+        if (os.path.isdir(args.output) or args.output.endswith(path_separators)
+                or not output_ext):
+            output_folder = args.output
+        elif output_ext != '.xlsx':
+            print(f"Error: output must be a .xlsx file or a folder: {args.output}")
+            sys.exit(1)
+        else:
+            output_file = args.output
+            output_folder = os.path.dirname(os.path.abspath(output_file))
+            if not os.path.isdir(output_folder):
+                print(f"Error: output folder not found: {output_folder}")
+                sys.exit(1)
+    
+    # Step 1: Select input file (skipped when given on the command line)
+    if args.input_file:
+        if not os.path.isfile(args.input_file):
+            print(f"Error: SAP export file not found: {args.input_file}")
+            sys.exit(1)
+        input_file = args.input_file
+    else:
+        # Wait 1 second before opening file picker
+        print("Opening file picker in 1 second...")
+        time.sleep(1)
+        
+        print("Step 1: Select SAP export file...")
+        input_file = select_input_file(last_paths.get('input_dir'))
     print(f"✓ Selected: {input_file}\n")
     
-    # Extract Order number from the selected file
+    # Read the export once and extract the Order number from it
     print("Extracting Order number from export file...")
     try:
-        order_num = get_order_from_export(input_file)
+        df_export = read_sap_export(input_file)
+        order_num = get_order_from_export(df_export)
         print(f"✓ Order number: {order_num}\n")
     except Exception as e:
         print(f"Error extracting Order number: {e}")
         sys.exit(1)
     
-    # Step 2: Select output folder
-    print("Step 2: Select output folder...")
-    output_folder = select_output_folder()
-    print(f"✓ Selected folder: {output_folder}\n")
-    
-    # Generate output filename in the selected folder
-    output_file = generate_output_filename(order_num, output_folder)
+    # Step 2: Select output folder (an explicit output file is used as-is)
+    if output_file is None:
+        if output_folder is None:
+            print("Step 2: Select output folder...")
+            output_folder = select_output_folder(last_paths.get('output_dir'))
+        else:
+            # A command-line folder is created only once the export has been read
+            try:
+                os.makedirs(output_folder, exist_ok=True)
+            except OSError as e:
+                print(f"Error: could not create output folder {output_folder}: {e}")
+                sys.exit(1)
+        print(f"✓ Selected folder: {output_folder}\n")
+        
+        # Generate output filename in the selected folder
+        output_file = generate_output_filename(order_num, output_folder)
     print(f"Output file will be saved as: {os.path.basename(output_file)}")
     print(f"Full path: {output_file}\n")
     
     # Run transformation
-    transform_sap_to_heavybid(input_file, output_file)
+    transform_sap_to_heavybid(input_file, output_file, df_export)
+    save_last_paths(input_file, output_folder)